@@ -16,6 +16,8 @@ def launch_modularpy(params):
     modularpy = MainWindow(config) # create the MainWindow object, passing the ExperimentConfig object
     modularpy.show() # show the MainWindow object
     app.exec() # start the QT event loop
+    config.hardware.shutdown() # stop the encoder, which hands a running session to the finalizer
+    config.wait_for_finalization() # let the session finish saving before the process exits
 
 # -----------------------------------------------------------------------------
 
@@ -32,6 +34,51 @@ def cli():
 def launch(params):
     launch_modularpy(params)
 
+@cli.command()
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', default=None, help='Path of the archive (defaults to the CSV path with .mpz)')
+@click.option('--codec', type=click.Choice(['zlib', 'lzma']), default='zlib', help='Compression codec')
+@click.option('--chunk-size', default=4096, help='Samples per compressed chunk')
+@click.option('--lick-resolution', default=1.0, help='Capacitance step stored losslessly (use e.g. 1e-10 for float plot exports)')
+def archive(csv_path, output, codec, chunk_size, lick_resolution):
+    """Convert an encoder data CSV into a compressed session archive."""
+    from modularpy.io.archive import archive_csv
+    path = archive_csv(csv_path, output, chunk_size=chunk_size, codec=codec, lick_resolution=lick_resolution)
+    print(f'Archive saved to {path}')
+
+@cli.command()
+@click.option('--duration', default=3600.0, help='Wall time to run in seconds')
+@click.option('--rate', default=20.0, help='Simulated encoder sample rate in Hz')
+@click.option('--sample-every', default=10.0, help='Seconds between health samples')
+@click.option('--output', default=None, help='CSV path for the raw health samples')
+def soak(duration, rate, sample_every, output):
+    """Run the acquisition stack offscreen and report memory and latency drift."""
+    from modularpy.soak import run_soak
+    run_soak(duration, rate_hz=rate, sample_every_s=sample_every, output=output)
+
+@cli.command()
+@click.argument('data_root', type=click.Path(exists=True, file_okay=False))
+@click.option('--lick-threshold', default=500.0, help='Capacitance at or above which a lick is counted')
+@click.option('--cm-per-click', default=1.0, help='Distance per encoder click (1.0 reports clicks)')
+@click.option('--workers', default=None, type=int, help='Worker processes (defaults to the CPU count)')
+@click.option('--output', default=None, help='Path of the cohort summary CSV')
+def summarize(data_root, lick_threshold, cm_per_click, workers, output):
+    """Summarize every session under DATA_ROOT, reusing cached results."""
+    from modularpy.summary import summarize_cohort
+    table = summarize_cohort(data_root, lick_threshold, cm_per_click, workers, output)
+    if not table.empty:
+        print(table.drop(columns='file').to_string(index=False))
+
+@cli.command()
+@click.argument('journal_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output-dir', default=None, help='Directory for the rebuilt files (defaults to the journal directory)')
+def recover(journal_path, output_dir):
+    """Rebuild encoder data, configuration and notes from a session journal."""
+    from modularpy.io.journal import recover as recover_journal
+    paths = recover_journal(journal_path, output_dir)
+    for kind, path in paths.items():
+        print(f'{kind.capitalize()} saved to {path}')
+
 # -----------------------------------------------------------------------------
 
 if __name__ == "__main__":
@@ -5,7 +5,14 @@ import os
 import datetime
 import yaml
 
-from modularpy.io import SerialWorker
+from modularpy.io import (
+    SerialWorker,
+    ReplayWorker,
+    TriggeredRecorder,
+    SerialConnectionManager,
+    SessionJournal,
+    SessionFinalizer,
+)
     
 class ExperimentConfig:
     """## Generate and store parameters loaded from a JSON file. 
@@ -24,7 +31,7 @@ class ExperimentConfig:
     # Update a parameter
     config.update_parameter('new_param', 'test_value')
 
-    # Save parameters and notes
+    # Save parameters, notes and encoder statistics
     config.save_configuration()
     ```
     """
@@ -38,6 +45,8 @@ class ExperimentConfig:
         self.hardware = HardwareManager(path)
         
         self.notes: list = []
+        self.journal: SessionJournal = None
+        self._finalizers: list = []
 
     @property
     def encoder(self) -> SerialWorker:
@@ -87,6 +96,14 @@ class ExperimentConfig:
     def encoder_file_path(self):
         return self._generate_unique_file_path(suffix="encoder-data", extension="csv", bids_type='beh')
     
+    @property
+    def encoder_background_file_path(self):
+        return self._generate_unique_file_path(suffix="encoder-background", extension="csv", bids_type='beh')
+
+    @property
+    def encoder_stats_file_path(self):
+        return self._generate_unique_file_path(suffix="encoder-stats", extension="json", bids_type='beh')
+
     @property
     def dataframe(self):
         data = {'Parameter': list(self._parameters.keys()),
@@ -122,6 +139,18 @@ class ExperimentConfig:
             file_path = os.path.join(bids_path, f"{base}_{counter}{ext}")
             counter += 1
         return file_path
+
+    def _claim_unique_file_path(self, suffix: str, extension: str, bids_type: str = None):
+        """ Like `_generate_unique_file_path`, but creates the (empty) file so no other writer can pick the same path.
+        """
+        while True:
+            file_path = self._generate_unique_file_path(suffix, extension, bids_type)
+            try:
+                open(file_path, 'x').close()
+                return file_path
+            except FileExistsError:
+                # Claimed by another writer since the existence check; generate the next name
+                continue
         
     def load_parameters(self, json_file_path) -> None:
         """ Load parameters from a JSON file path into the config object. 
@@ -138,47 +167,184 @@ class ExperimentConfig:
 
     def update_parameter(self, key, value) -> None:
         self._parameters[key] = value
+        if self.journal is not None:
+            self.journal.set_parameter(key, value)
+
+    def add_note(self, note: str) -> None:
+        """ Append a note, journaling it immediately so it survives a crash.
+        """
+        self.notes.append(note)
+        if self.journal is not None:
+            self.journal.add_note(note)
+
+    def start_journal(self, flush_interval_s: float = 1.0) -> None:
+        """ Open a crash-safe journal for the session and attach it to the encoder.
+
+        The journal records the current configuration and notes, then every kept encoder sample,
+        note and parameter change. `finalize_session` deletes it once the session is saved; recover an
+        interrupted session with `python -m modularpy recover`.
+        """
+        self.close_journal()
+        path = self._generate_unique_file_path(suffix="journal", extension="wal")
+        self.journal = SessionJournal(path, flush_interval_s=flush_interval_s)
+        self.journal.write_meta({
+            'configuration': dict(self.list_parameters().values.tolist()),
+            'parameters': self._parameters,
+            'notes': self.notes,
+        })
+        self.encoder.journal = self.journal
+        print(f"Session journal started at {path}")
+
+    def close_journal(self) -> None:
+        if self.journal is None:
+            return
+        self.encoder.journal = None
+        self.journal.close()
+        self.journal = None
         
     def list_parameters(self) -> pd.DataFrame:
         """ Create a DataFrame from the ExperimentConfig properties 
         """
         properties = [prop for prop in dir(self.__class__) if isinstance(getattr(self.__class__, prop), property)]
-        exclude_properties = {'dataframe', 'parameters', 'json_path', "_cores", "meso_sequence", "pupil_sequence", "psychopy_path", "encoder"}
+        exclude_properties = {'dataframe', 'parameters', 'json_path', "_cores", "meso_sequence", "pupil_sequence", "psychopy_path", "encoder", "encoder_background_file_path", "encoder_stats_file_path"}
         data = {prop: getattr(self, prop) for prop in properties if prop not in exclude_properties}
         return pd.DataFrame(data.items(), columns=['Parameter', 'Value'])
                 
-    def save_encoder_data(self, data):
-        """ Save the encoder data to a CSV file 
+    def save_encoder_data(self, data, path: str = None) -> bool:
+        """ Save the encoder data to a CSV file (a new unique path unless `path` is given)
         """
-        if isinstance(data, list):
+        if isinstance(data, (list, dict)):
             data = pd.DataFrame(data)
            
         try:
-            data.to_csv(self.encoder_file_path, index=False)
-            print(f"Encoder data saved to {self.encoder_file_path}")
+            encoder_path = path or self.encoder_file_path
+            data.to_csv(encoder_path, index=False)
+            print(f"Encoder data saved to {encoder_path}")
+            return True
         except Exception as e:
             print(f"Error saving encoder data: {e}")
-            
-    def save_configuration(self):
-        """ Save the configuration parameters to a CSV file 
+            return False
+
+    def save_encoder_background(self, background, path: str = None) -> bool:
+        """ Save the decimated background trace of a triggered recording to a CSV file
+        """
+        try:
+            background_path = path or self.encoder_background_file_path
+            background.to_csv(background_path, index=False)
+            print(f"Encoder background saved to {background_path}")
+            return True
+        except Exception as e:
+            print(f"Error saving encoder background: {e}")
+            return False
+
+    def save_parameters(self, params: pd.DataFrame = None, path: str = None) -> bool:
+        """ Save the configuration parameters (defaults to `list_parameters()`) to a CSV file
         """
-        params_path = self._generate_unique_file_path(suffix="configuration", extension="csv")
-        
-        # Save the configuration parameters to a CSV file
         try:
-            params = self.list_parameters()
+            params_path = path or self._generate_unique_file_path(suffix="configuration", extension="csv")
+            params = self.list_parameters() if params is None else params
             params.to_csv(params_path, index=False)
             print(f"Configuration saved to {params_path}")
+            return True
         except Exception as e:
             print(f"Error saving configuration: {e}")
-        
-        # Save the notes to a text file
+            return False
+
+    def save_notes(self, notes: list = None, path: str = None) -> bool:
+        """ Save the notes (defaults to `self.notes`) to a text file
+        """
         try:
-            with open(self.notes_file_path, 'w') as f:
-                f.write('\n'.join(self.notes))
-                print(f"Notes saved to {self.notes_file_path}")
+            notes_path = path or self.notes_file_path
+            with open(notes_path, 'w') as f:
+                f.write('\n'.join(self.notes if notes is None else notes))
+            print(f"Notes saved to {notes_path}")
+            return True
         except Exception as e:
             print(f"Error saving notes: {e}")
+            return False
+
+    def save_encoder_stats(self, stats: dict = None, path: str = None) -> bool:
+        """ Save the running statistics of the encoder stream (defaults to the live ones) to a JSON file
+        """
+        try:
+            stats_path = path or self.encoder_stats_file_path
+            stats = self.encoder.stats.to_dict() if stats is None else stats
+            with open(stats_path, 'w') as f:
+                json.dump(stats, f, indent=1, allow_nan=False)
+            print(f"Encoder statistics saved to {stats_path}")
+            return True
+        except Exception as e:
+            print(f"Error saving encoder statistics: {e}")
+            return False
+            
+    def save_configuration(self) -> bool:
+        """ Save the configuration parameters, notes and encoder statistics
+        """
+        return all([self.save_parameters(), self.save_notes(), self.save_encoder_stats()])
+
+    def finalize_session(self, journal: SessionJournal = None) -> SessionFinalizer:
+        """ Save the stopped session on a background thread and return the running SessionFinalizer.
+
+        Data, configuration, notes, statistics and the journal are snapshotted (without copying
+        samples) and their file paths claimed here, so the GUI stays responsive and the next
+        session can be configured and started while the previous one is still being written.
+        Pass the `journal` of the stopped run if a newer one may already have been started;
+        it defaults to the current journal.
+        Connect to the finalizer's `finalizeProgress` and `finalizeCompleted` signals to follow it.
+        """
+        session = self.encoder.detach_data()
+        if journal is None:
+            journal = self.journal
+        if self.journal is journal:
+            self.journal = None
+        if self.encoder.journal is journal:
+            self.encoder.journal = None
+        notes = list(self.notes)
+        params = self.list_parameters()
+
+        # Claim every path now: a finalization still running, or one started in the same second, must not get the same names
+        recorder = session['recorder']
+        encoder_path = self._claim_unique_file_path(suffix="encoder-data", extension="csv", bids_type='beh')
+        background_path = self._claim_unique_file_path(suffix="encoder-background", extension="csv", bids_type='beh') if recorder is not None else None
+        params_path = self._claim_unique_file_path(suffix="configuration", extension="csv")
+        notes_path = self._claim_unique_file_path(suffix="notes", extension="txt")
+        stats_path = self._claim_unique_file_path(suffix="encoder-stats", extension="json", bids_type='beh')
+
+        def save_encoder_data():
+            data = recorder.get_data() if recorder is not None else session['data']
+            return self.save_encoder_data(data, encoder_path)
+
+        # Each step is (description, saver, claimed path); the finalizer removes the path if the step fails
+        steps = [('encoder data', save_encoder_data, encoder_path)]
+        if recorder is not None:
+            steps.append(('encoder background', lambda: self.save_encoder_background(recorder.get_background(), background_path), background_path))
+        steps += [
+            ('configuration', lambda: self.save_parameters(params, params_path), params_path),
+            ('notes', lambda: self.save_notes(notes, notes_path), notes_path),
+            ('encoder statistics', lambda: self.save_encoder_stats(session['stats'], stats_path), stats_path),
+        ]
+
+        def close_journal():
+            # The journal is only needed until everything it holds is saved; keep it for recovery otherwise
+            if finalizer.failures:
+                journal.close()
+                print(f"Session journal kept at {journal.path}")
+            else:
+                journal.delete()
+
+        if journal is not None:
+            steps.append(('session journal', close_journal, None))
+
+        finalizer = SessionFinalizer(steps)
+        finalizer.finished.connect(lambda: self._finalizers.remove(finalizer))
+        self._finalizers.append(finalizer)
+        finalizer.start()
+        return finalizer
+
+    def wait_for_finalization(self) -> None:
+        """ Block until every session handed to `finalize_session` has been written. """
+        for finalizer in list(self._finalizers):
+            finalizer.wait()
                     
 
 
@@ -195,11 +361,13 @@ class HardwareManager:
 
     def __init__(self, config_file: str):
         self.yaml = self._load_hardware_from_yaml(config_file)
+        self.connections = SerialConnectionManager()
         self._initialize_encoder()       
         
 
     def shutdown(self):
         self.encoder.stop()
+        self.connections.close_all()
     
 
     def _load_hardware_from_yaml(self, path):
@@ -217,12 +385,33 @@ class HardwareManager:
     def _initialize_encoder(self):
         if self.yaml.get("encoder"):
             params = self.yaml.get("encoder")
-            self.encoder = SerialWorker(
-                serial_port=params.get('port'),
-                baud_rate=params.get('baudrate'),
-                sample_interval=params.get('sample_interval_ms'),
-                development_mode=params.get('development_mode'),
-                resistor=params.get('resistor')
-            )
+            if params.get('replay_file'):
+                self.encoder = ReplayWorker(
+                    replay_file=params.get('replay_file'),
+                    speed=params.get('replay_speed', 1.0),
+                    sample_interval=params.get('sample_interval_ms'),
+                    resistor=params.get('resistor')
+                )
+            else:
+                self.encoder = SerialWorker(
+                    serial_port=params.get('port'),
+                    baud_rate=params.get('baudrate'),
+                    sample_interval=params.get('sample_interval_ms'),
+                    development_mode=params.get('development_mode'),
+                    resistor=params.get('resistor'),
+                    connections=self.connections
+                )
+                if not self.encoder.development_mode:
+                    # Open the port now so the board's reset happens once, at startup
+                    self.connections.open(self.encoder.serial_port, self.encoder.baud_rate)
+
+            recording = params.get('recording') or {}
+            if recording.get('mode') == 'triggered':
+                self.encoder.recorder = TriggeredRecorder(
+                    pre_window_s=recording.get('pre_window_s', 1.0),
+                    post_window_s=recording.get('post_window_s', 2.0),
+                    threshold=recording.get('threshold'),
+                    background_decimation=recording.get('background_decimation', 20)
+                )
          
 
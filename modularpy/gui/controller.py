@@ -96,7 +96,7 @@ class ConfigController(QWidget):
         if ok and text:
             time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             note_with_timestamp = f"{time}: {text}"
-            self.config.notes.append(note_with_timestamp)
+            self.config.add_note(note_with_timestamp)
             print("Note added to configuration.")
     #-----------------------------------------------------------------------------------------------#
     
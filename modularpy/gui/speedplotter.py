@@ -1,3 +1,4 @@
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton
 import pyqtgraph as pg
 
@@ -21,6 +22,7 @@ class EncoderWidget(QWidget):
         # Status label to show connection status
         self.status_label = QLabel("Click 'Start Live View' to begin.")
         self.info_label = QLabel(f'Viewing data from {self.encoder} at Port: {self.encoder.serial_port} | Baud: {self.encoder.baud_rate} | Resistor: {self.encoder.resistor}')
+        self.stats_label = QLabel("Signal statistics appear once data is received.")
         self.start_button = QPushButton("Start Live View")
         self.start_button.setCheckable(True)
         self.plot_widget = pg.PlotWidget()
@@ -30,6 +32,7 @@ class EncoderWidget(QWidget):
 
         self.layout.addWidget(self.status_label)
         self.layout.addWidget(self.info_label)
+        self.layout.addWidget(self.stats_label)
         self.layout.addWidget(self.start_button)
         self.layout.addWidget(self.plot_widget)
         self.setLayout(self.layout)
@@ -47,27 +50,54 @@ class EncoderWidget(QWidget):
         # self.encoder.serialStreamStarted.connect(self.start_live_view)
         # self.encoder.serialDataReceived.connect(self.process_data)
         # self.encoder.serialStreamStopped.connect(self.stop_timer)
+        self.encoder.serialStreamStopped.connect(self.finalize_session)
         self.encoder.serialCapacitanceUpdated.connect(self.receive_lick_data) 
         #========================================================================================#
 
+        # Refresh the running statistics once a second; queries are O(1) and copy no data
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.stats_timer.start()
+
     def init_data(self):
         self.times = []
         self.licks = []
         self.start_time = None
         self.timer = None
         self.previous_time = 0
+        self.stopping_journal = None
 
     def toggle_serial_thread(self):
         if self.start_button.isChecked():
+            self.config.start_journal()
             self.encoder.start()
             self.status_label.setText("Serial thread started.")
         else:
             self.stop_serial_thread()
-            self.status_label.setText("Serial thread stopped.")
+            self.status_label.setText("Stopping serial thread...")
 
     def stop_serial_thread(self):
         if self.encoder is not None:
-            self.encoder.stop()
+            # No new run until this one has stopped; its journal is the one to finalize
+            self.start_button.setEnabled(False)
+            self.stopping_journal = self.config.journal
+            # Non-blocking: finalize_session runs once the thread has actually finished
+            self.encoder.request_stop()
+
+    def finalize_session(self):
+        """ Save the stopped session in the background, reporting progress in the status label.
+        """
+        self.status_label.setText("Serial thread stopped. Saving session...")
+        journal, self.stopping_journal = self.stopping_journal, None
+        finalizer = self.config.finalize_session(journal)
+        self.start_button.setChecked(False)
+        self.start_button.setEnabled(True)
+        finalizer.finalizeProgress.connect(
+            lambda step, total, description: self.status_label.setText(f"Saving {description} ({step}/{total})...")
+        )
+        finalizer.finalizeFailed.connect(self.status_label.setText)
+        finalizer.finalizeCompleted.connect(lambda: self.status_label.setText("Session saved."))
 
     def receive_lick_data(self, time, lick):
         self.times.append(time)
@@ -78,6 +108,17 @@ class EncoderWidget(QWidget):
         self.update_plot()
 
 
+    def update_stats(self):
+        # The worker thread folds samples into the channels under the lock; read a consistent snapshot
+        lick = self.encoder.stats.summary()['Lick']
+        if lick['count'] == 0:
+            return
+        self.stats_label.setText(
+            f"Capacitance: mean {lick['mean']:.1f} ± {lick['std']:.1f} | range {lick['min']:.0f}–{lick['max']:.0f} | "
+            f"recent p5/p50/p95 {lick['p5']:.0f}/{lick['p50']:.0f}/{lick['p95']:.0f} | n={lick['count']}"
+        )
+
+
     def update_plot(self):
         try:
             if self.times and self.licks:
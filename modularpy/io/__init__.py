@@ -9,3 +9,11 @@ rather than:
 from modularpy.io.encoder import SerialWorker
 """
 from .encoder import SerialWorker
+from .replay import ReplayWorker
+from .archive import SessionArchiveReader, SessionArchiveWriter
+from .trigger import TriggeredRecorder
+from .scheduler import DeadlineScheduler
+from .connection import SerialConnectionManager
+from .journal import SessionJournal
+from .stats import StreamStatistics
+from .finalize import SessionFinalizer
@@ -0,0 +1,312 @@
+"""
+Chunked, compressed archival format for encoder session streams.
+
+Layout of an archive file:
+
+    MAGIC | header length (u32) | JSON header
+    chunk 0 | chunk 1 | ... | chunk N-1
+    index (N fixed-size entries) | index offset (u64) | chunk count (u32) | INDEX_MAGIC
+
+Each chunk holds up to `chunk_size` samples. Within a chunk every column is stored as its
+first value plus the deltas (or the offsets from the first value for `Clicks`, which are
+already deltas), cast to the narrowest integer dtype that fits, and the whole chunk is
+compressed with zlib or lzma. Times are quantized to `time_resolution` (1 us by default) and
+capacitance to `lick_resolution` (1 by default, i.e. integer counts); capacitance that is not
+a multiple of `lick_resolution` is rejected rather than silently rounded.
+The index records the byte range and time span of every chunk so a time window can be
+read by decompressing only the chunks that overlap it.
+"""
+
+import json
+import lzma
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b'MPYARC1\x00'
+INDEX_MAGIC = b'MPYIDX1\x00'
+EXTENSION = 'mpz'
+
+COLUMNS = ('Clicks', 'Time', 'Lick')
+DELTA_COLUMNS = ('Time', 'Lick')
+
+_CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+_INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+_HEADER_LEN = struct.Struct('<I')
+_INDEX_ENTRY = struct.Struct('<QIIdd')   # offset, nbytes, samples, t_start, t_end
+_TRAILER = struct.Struct('<QI8s')        # index offset, chunk count, INDEX_MAGIC
+_COLUMN_HEADER = struct.Struct('<BqI')   # dtype code, base value, payload bytes
+
+
+def _narrowest_dtype(values: np.ndarray) -> int:
+    """ Return the code of the smallest signed integer dtype able to hold every value.
+    """
+    if values.size == 0:
+        return 0
+    lo, hi = int(values.min()), int(values.max())
+    for code, dtype in enumerate(_INT_DTYPES):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return code
+    return len(_INT_DTYPES) - 1
+
+
+class SessionArchiveWriter:
+    """ Write encoder samples into a chunked, compressed archive.
+
+    #### Example Usage:
+    ```python
+    with SessionArchiveWriter('session.mpz', codec='lzma') as archive:
+        archive.extend(df['Time'], df['Clicks'], df['Lick'])
+    ```
+    """
+
+    def __init__(self, path: str, chunk_size: int = 4096, codec: str = 'zlib',
+                 time_resolution: float = 1e-6, lick_resolution: float = 1):
+        if codec not in _CODECS:
+            raise ValueError(f"Unknown codec '{codec}', expected one of {list(_CODECS)}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self.codec = codec
+        self.time_resolution = time_resolution
+        self.lick_resolution = lick_resolution
+        self._compress = _CODECS[codec][0]
+
+        self._pending = {name: [] for name in COLUMNS}
+        self._index: list[tuple] = []
+        self._file = open(path, 'wb')
+
+        header = json.dumps({
+            'columns': list(COLUMNS),
+            'chunk_size': chunk_size,
+            'codec': codec,
+            'time_resolution': time_resolution,
+            'lick_resolution': lick_resolution,
+        }).encode('utf-8')
+        self._file.write(MAGIC)
+        self._file.write(_HEADER_LEN.pack(len(header)))
+        self._file.write(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, time: float, clicks: int, lick: int) -> None:
+        """ Append a single sample, writing a chunk whenever `chunk_size` samples are pending.
+        """
+        self.extend([time], [clicks], [lick])
+
+    def _quantize(self, name: str, values, resolution: float) -> np.ndarray:
+        """ Convert values to integer multiples of `resolution`, refusing any that would be rounded.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        quantized = np.round(values / resolution)
+        error = np.abs(quantized * resolution - values)
+        if values.size and not (error <= 0.01 * resolution + 4 * np.finfo(np.float64).eps * np.abs(values)).all():
+            bad = values[np.argmax(error)]
+            raise ValueError(
+                f"{name} value {bad} is not a multiple of {resolution}; "
+                f"pass a finer resolution to store it without loss"
+            )
+        return quantized.astype(np.int64)
+
+    def extend(self, times, clicks, licks) -> None:
+        """ Append many samples at once from array-likes of equal length.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        clicks = self._quantize('Clicks', clicks, 1)
+        licks = self._quantize('Lick', licks, self.lick_resolution)
+        if not (len(times) == len(clicks) == len(licks)):
+            raise ValueError("times, clicks and licks must have the same length")
+
+        start = 0
+        while start < len(times):
+            room = self.chunk_size - len(self._pending['Time'])
+            stop = start + room
+            self._pending['Time'].extend(times[start:stop].tolist())
+            self._pending['Clicks'].extend(clicks[start:stop].tolist())
+            self._pending['Lick'].extend(licks[start:stop].tolist())
+            if len(self._pending['Time']) >= self.chunk_size:
+                self._flush_chunk()
+            start = stop
+
+    def close(self) -> None:
+        """ Write any pending samples, the chunk index and the trailer, then close the file.
+        """
+        if self._file.closed:
+            return
+        if self._pending['Time']:
+            self._flush_chunk()
+
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+
+    def _flush_chunk(self) -> None:
+        times = np.asarray(self._pending['Time'], dtype=np.float64)
+        columns = {
+            'Clicks': np.asarray(self._pending['Clicks'], dtype=np.int64),
+            'Time': np.round(times / self.time_resolution).astype(np.int64),
+            'Lick': np.asarray(self._pending['Lick'], dtype=np.int64),  # already quantized
+        }
+
+        payload = bytearray()
+        for name in COLUMNS:
+            values = columns[name]
+            base = int(values[0])
+            stored = np.diff(values) if name in DELTA_COLUMNS else values[1:] - base
+            code = _narrowest_dtype(stored)
+            data = stored.astype(_INT_DTYPES[code]).tobytes()
+            payload += _COLUMN_HEADER.pack(code, base, len(data))
+            payload += data
+
+        chunk = self._compress(bytes(payload))
+        offset = self._file.tell()
+        self._file.write(chunk)
+        self._index.append((offset, len(chunk), len(times), float(times[0]), float(times[-1])))
+        self._pending = {name: [] for name in COLUMNS}
+
+
+class SessionArchiveReader:
+    """ Read encoder samples back from an archive written by `SessionArchiveWriter`.
+
+    Only the chunk index is loaded on open; sample data is decompressed on demand.
+
+    #### Example Usage:
+    ```python
+    archive = SessionArchiveReader('session.mpz')
+    window = archive.read(start=60.0, end=120.0)  # DataFrame with Clicks, Time, Lick
+    ```
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a modularpy session archive: {path}")
+            (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+            self.header = json.loads(f.read(header_len).decode('utf-8'))
+
+            f.seek(-_TRAILER.size, 2)
+            index_offset, n_chunks, index_magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if index_magic != INDEX_MAGIC:
+                raise ValueError(f"Archive index is missing or truncated: {path}")
+            f.seek(index_offset)
+            raw_index = f.read(n_chunks * _INDEX_ENTRY.size)
+
+        entries = [_INDEX_ENTRY.unpack_from(raw_index, i * _INDEX_ENTRY.size) for i in range(n_chunks)]
+        self.index = np.array(entries, dtype=[
+            ('offset', np.uint64), ('nbytes', np.uint32), ('samples', np.uint32),
+            ('t_start', np.float64), ('t_end', np.float64),
+        ])
+        self.time_resolution = self.header['time_resolution']
+        self.lick_resolution = self.header.get('lick_resolution', 1)
+        self._decompress = _CODECS[self.header['codec']][1]
+
+    def __len__(self) -> int:
+        return int(self.index['samples'].sum())
+
+    @property
+    def duration(self) -> float:
+        if len(self.index) == 0:
+            return 0.0
+        return float(self.index['t_end'][-1] - self.index['t_start'][0])
+
+    def chunks_for(self, start: float = None, end: float = None) -> np.ndarray:
+        """ Return the indices of the chunks overlapping the [start, end] time window.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.index['t_end'], start, side='left'))
+        hi = len(self.index) if end is None else int(np.searchsorted(self.index['t_start'], end, side='right'))
+        return np.arange(lo, max(lo, hi))
+
+    def read(self, start: float = None, end: float = None):
+        """ Return the samples within [start, end] seconds as a DataFrame.
+        """
+        from pandas import DataFrame
+
+        chunk_ids = self.chunks_for(start, end)
+        parts = {name: [] for name in COLUMNS}
+        with open(self.path, 'rb') as f:
+            for i in chunk_ids:
+                entry = self.index[i]
+                f.seek(int(entry['offset']))
+                decoded = self._decode_chunk(f.read(int(entry['nbytes'])), int(entry['samples']))
+                for name in COLUMNS:
+                    parts[name].append(decoded[name])
+
+        data = {
+            name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=np.int64)
+            for name in COLUMNS
+        }
+        data['Time'] = data['Time'] * self.time_resolution
+        if self.lick_resolution != 1:
+            data['Lick'] = data['Lick'] * self.lick_resolution
+
+        mask = np.ones(len(data['Time']), dtype=bool)
+        if start is not None:
+            mask &= data['Time'] >= start
+        if end is not None:
+            mask &= data['Time'] <= end
+        return DataFrame({name: data[name][mask] for name in COLUMNS})
+
+    def _decode_chunk(self, chunk: bytes, samples: int) -> dict:
+        payload = self._decompress(chunk)
+        decoded = {}
+        pos = 0
+        for name in COLUMNS:
+            code, base, nbytes = _COLUMN_HEADER.unpack_from(payload, pos)
+            pos += _COLUMN_HEADER.size
+            stored = np.frombuffer(payload, dtype=_INT_DTYPES[code], count=samples - 1, offset=pos).astype(np.int64)
+            pos += nbytes
+            values = np.empty(samples, dtype=np.int64)
+            values[0] = base
+            if name in DELTA_COLUMNS:
+                np.cumsum(stored, out=values[1:])
+                values[1:] += base
+            else:
+                values[1:] = stored + base
+            decoded[name] = values
+        return decoded
+
+
+def archive_csv(csv_path: str, archive_path: str = None, chunk_size: int = 4096,
+                codec: str = 'zlib', lick_resolution: float = 1) -> str:
+    """ Convert an encoder data CSV into an archive, streaming it in chunks.
+
+    Plot exports with fractional capacitance need a matching `lick_resolution` (e.g. 1e-10 for
+    values written with ten decimals); otherwise a ValueError is raised and no archive is left.
+    Returns the path of the written archive.
+    """
+    import os
+    import pandas as pd
+
+    if archive_path is None:
+        archive_path = f"{os.path.splitext(csv_path)[0]}.{EXTENSION}"
+
+    archive = SessionArchiveWriter(archive_path, chunk_size=chunk_size, codec=codec,
+                                   lick_resolution=lick_resolution)
+    try:
+        for frame in pd.read_csv(csv_path, chunksize=chunk_size * 16):
+            if 'x0000' in frame.columns:
+                # Two column plot exports only carry time and capacitance
+                frame = frame.rename(columns={'x0000': 'Time', 'y0000': 'Lick'})
+                frame['Clicks'] = 0
+            archive.extend(frame['Time'], frame['Clicks'], frame['Lick'])
+    except Exception:
+        archive.close()
+        os.remove(archive_path)
+        raise
+    archive.close()
+    return archive_path
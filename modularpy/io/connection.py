@@ -0,0 +1,94 @@
+import threading
+import time
+
+import serial
+
+
+class SerialConnectionManager:
+    """ Keep serial ports open across acquisition runs.
+
+    Opening the port of an Arduino-class board resets it, which costs about two seconds and a
+    few samples on every "Start Live View". The manager opens each port once, hands the same
+    connection to every run (flushing whatever arrived in between), and reconnects with
+    exponential backoff when the device disappears.
+
+    #### Example Usage:
+    ```python
+    connections = SerialConnectionManager()
+    connections.open('COM4', 9600)            # warm up once, e.g. at application start
+    arduino = connections.acquire('COM4', 9600)  # cheap: flushes input, no reset
+    connections.close_all()                   # on shutdown
+    ```
+    """
+
+    def __init__(self, timeout: float = 0.1, initial_backoff_s: float = 0.1, max_backoff_s: float = 5.0):
+        self.timeout = timeout
+        self.initial_backoff_s = initial_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._connections: dict[str, serial.Serial] = {}
+        self._lock = threading.Lock()
+
+    def open(self, port: str, baud_rate: int) -> serial.Serial | None:
+        """ Return the open connection to `port`, opening it first if needed.
+        """
+        with self._lock:
+            connection = self._connections.get(port)
+            if connection is not None and connection.is_open:
+                if connection.baudrate != baud_rate:
+                    connection.baudrate = baud_rate
+                return connection
+            try:
+                connection = serial.Serial(port, baud_rate, timeout=self.timeout)
+            except serial.SerialException as e:
+                print(f"Serial connection error: {e}")
+                return None
+            self._connections[port] = connection
+            print(f"Serial port {port} opened.")
+            return connection
+
+    def acquire(self, port: str, baud_rate: int) -> serial.Serial | None:
+        """ Return a warm connection with stale input discarded, ready for a new run.
+        """
+        connection = self.open(port, baud_rate)
+        if connection is None:
+            return None
+        try:
+            connection.reset_input_buffer()
+        except (serial.SerialException, OSError) as e:
+            print(f"Serial port {port} went away: {e}")
+            self.close(port)
+            return self.open(port, baud_rate)
+        return connection
+
+    def reconnect(self, port: str, baud_rate: int, should_abort=None) -> serial.Serial | None:
+        """ Drop the connection to `port` and reopen it, backing off exponentially between attempts.
+
+        `should_abort` is polled while waiting; returns None if it becomes True.
+        """
+        self.close(port)
+        backoff = self.initial_backoff_s
+        while True:
+            connection = self.open(port, baud_rate)
+            if connection is not None:
+                return connection
+            print(f"Retrying serial port {port} in {backoff:.1f} s...")
+            deadline = time.perf_counter() + backoff
+            while time.perf_counter() < deadline:
+                if should_abort is not None and should_abort():
+                    return None
+                time.sleep(min(0.05, backoff))
+            backoff = min(backoff * 2, self.max_backoff_s)
+
+    def close(self, port: str):
+        with self._lock:
+            connection = self._connections.pop(port, None)
+        if connection is not None:
+            try:
+                connection.close()
+                print(f"Serial port {port} closed.")
+            except Exception as e:
+                print(f"Exception while closing serial port: {e}")
+
+    def close_all(self):
+        for port in list(self._connections):
+            self.close(port)
@@ -2,9 +2,13 @@ import random
 import time
 import math
 from queue import Queue
+import threading
 import serial
 from PyQt6.QtCore import pyqtSignal, QThread
 
+from modularpy.io.scheduler import DeadlineScheduler
+from modularpy.io.stats import StreamStatistics
+
 #from modularpy.io import DataManager
 
 class SerialWorker(QThread):
@@ -16,14 +20,30 @@ class SerialWorker(QThread):
     
         1. `serialDataReceived` (pyqtSignal(int)): Emits each time a new encoder reading is captured.
         2. `serialStreamStarted` (pyqtSignal()): Emits when the streaming thread starts running.
-        3. `serialStreamStopped` (pyqtSignal()): Emits when the streaming thread stops running.
+        3. `serialStreamStopped` (pyqtSignal()): Emits once when a run stops, whether requested or ended on its own.
         4. `serialCapacitanceUpdated` (pyqtSignal(float, int)): Emits the elapsed time and current capacitance.
     
     Core Methods:
     
         `start()`: Initiates the thread and emits serialStreamStarted.
         `stop()`: Requests the thread interruption, waits for it, and emits serialStreamStopped.
+        `request_stop()`: Requests the thread interruption and returns; serialStreamStopped is emitted once the thread has finished.
         `get_data()`: Returns a DataFrame containing stored encoder readings, time, and capacitance.
+        `detach_data()`: Hands over the recorded data without copying and starts empty storage for the next run.
+        `pause()` / `resume()`: Suspends and resumes sampling without stopping the thread or closing the port.
+        `trigger()`: Marks an external event for the triggered recorder, if one is attached.
+
+    Connections:
+
+        When a `SerialConnectionManager` is passed as `connections`, the serial port is borrowed from it
+        instead of being opened and closed on every run, so starting the stream does not reset the board.
+
+    Recording:
+
+        By default every sample is kept in memory. Assigning a `TriggeredRecorder` to `recorder`
+        keeps only the windows around detected events plus a decimated background trace.
+        Assigning a `SessionJournal` to `journal` additionally logs every sample to a crash-safe journal.
+        Running per-channel statistics of every sample are always kept in `stats` (see `StreamStatistics`).
     """
     
     # ===================== PyQt Signals ===================== #
@@ -38,7 +58,8 @@ class SerialWorker(QThread):
                  baud_rate: int, 
                  sample_interval: int, 
                  resistor: int,
-                 development_mode: bool = True):
+                 development_mode: bool = True,
+                 connections=None):
         
         super().__init__()
 
@@ -48,6 +69,16 @@ class SerialWorker(QThread):
         self.baud_rate = baud_rate
         self.sample_interval_ms = sample_interval
         self.resistor = resistor
+        self.connections = connections
+        self.recorder = None
+        self.journal = None
+        self.scheduler = None
+        self.stats = StreamStatistics()
+        self._paused = threading.Event()
+        self._flush_requested = threading.Event()
+        self._stop_emitted = True
+        # Reports every run exactly once, including runs that end on their own (e.g. a failed port acquire)
+        self.finished.connect(self._emit_stopped)
 
         self.init_data()
 
@@ -58,9 +89,13 @@ class SerialWorker(QThread):
         self.licks = []
         self.clicks = []
         self.start_time = None
+        self.stats.reset()
+        if self.recorder is not None:
+            self.recorder.reset()
 
 
     def start(self):
+        self._stop_emitted = False
         self.serialStreamStarted.emit()
         return super().start()
     
@@ -68,7 +103,35 @@ class SerialWorker(QThread):
     def stop(self):
         self.requestInterruption()
         self.wait()
-        self.serialStreamStopped.emit()
+        self._emit_stopped()
+
+
+    def request_stop(self):
+        """ Ask the thread to stop without blocking the caller (e.g. the GUI thread).
+        """
+        self.requestInterruption()
+        if not self.isRunning():
+            self._emit_stopped()
+
+
+    def _emit_stopped(self):
+        # finished, stop() and request_stop() can all complete the same run; report it only once
+        if not self._stop_emitted:
+            self._stop_emitted = True
+            self.serialStreamStopped.emit()
+
+
+    def pause(self):
+        """ Stop sampling but keep the thread and serial connection alive. """
+        self._paused.set()
+
+
+    def resume(self):
+        """ Resume sampling; input received while paused is discarded. """
+        if self._paused.is_set():
+            # pyserial is not thread-safe: the worker flushes the port itself before its next read
+            self._flush_requested.set()
+        self._paused.clear()
 
 
     def run(self):
@@ -80,11 +143,23 @@ class SerialWorker(QThread):
             else:
                 self.run_serial_mode()
         finally:
+            self.stats.flush()
             print("Encoder Stream stopped.")
             
             
     def run_development_mode(self):
+        """
+        Simulates a board sampled at `sample_interval_ms`. Samples are paced by a DeadlineScheduler
+        so the achieved rate matches the configured one regardless of how long each sample takes.
+        """
+        self.scheduler = DeadlineScheduler(self.sample_interval_ms / 1000.0)
         while not self.isInterruptionRequested():
+            if self._paused.is_set():
+                # Paused time is neither sampled nor counted in the sampling statistics
+                self.scheduler.pause()
+                self.msleep(10)
+                continue
+            self.scheduler.resume()
             try:
                 # Simulate receiving random encoder clicks
                 clicks = random.randint(1, 10)  # Simulating random click values
@@ -98,7 +173,8 @@ class SerialWorker(QThread):
             except Exception as e:
                 print(f"Exception in DevelopmentSerialWorker: {e}")
                 self.requestInterruption()
-            self.msleep(self.sample_interval_ms)  # Sleep for sample interval to reduce CPU usage
+            self.scheduler.wait()  # Sleep until the next absolute sample deadline
+        print(f"Sampling: {self.scheduler.summary()}")
 
 
     def run_serial_mode(self):
@@ -117,16 +193,28 @@ class SerialWorker(QThread):
             `ValueError`: If non-integer values are encountered while reading data.
         """
         
-        try:
-            self.arduino = serial.Serial(self.serial_port, self.baud_rate, timeout=0.1)
-            print("Serial port opened.")
-        except serial.SerialException as e:
-            print(f"Serial connection error: {e}")
-            return
+        if self.connections is not None:
+            # Borrow the warm connection; no reopen, so the board is not reset
+            self.arduino = self.connections.acquire(self.serial_port, self.baud_rate)
+            if self.arduino is None:
+                return
+        else:
+            try:
+                self.arduino = serial.Serial(self.serial_port, self.baud_rate, timeout=0.1)
+                print("Serial port opened.")
+            except serial.SerialException as e:
+                print(f"Serial connection error: {e}")
+                return
         
         try:
             while not self.isInterruptionRequested():
+                if self._paused.is_set():
+                    self.msleep(10)
+                    continue
                 try:
+                    if self._flush_requested.is_set():
+                        self._flush_requested.clear()
+                        self.arduino.reset_input_buffer()
                     data = self.arduino.readline().decode('utf-8').strip()
                     if data:
                         clicks = int(data)
@@ -136,10 +224,17 @@ class SerialWorker(QThread):
                     print(f"Non-integer data received: {data}")
                 except serial.SerialException as e:
                     print(f"Serial exception: {e}")
-                    self.requestInterruption()
+                    if self.connections is None:
+                        self.requestInterruption()
+                    else:
+                        self.arduino = self.connections.reconnect(
+                            self.serial_port, self.baud_rate, should_abort=self.isInterruptionRequested)
+                        if self.arduino is None:
+                            break
                 self.msleep(1)  # Sleep for 1ms to reduce CPU usage
         finally:
-            if hasattr(self, 'arduino') and self.arduino is not None:
+            # Ports borrowed from the connection manager stay open for the next run
+            if self.connections is None and getattr(self, 'arduino', None) is not None:
                 try:
                     self.arduino.close()
                     print("Serial port closed.")
@@ -149,26 +244,79 @@ class SerialWorker(QThread):
 
     def process_data(self, position_change):
         try:
-            # Use fixed delta_time based on sample interval
-            delta_time = self.sample_interval_ms / 1000.0  # Convert milliseconds to seconds
-
             #capacitance readout
-            lick = int(float(self.arduino.readline().decode('utf-8').strip()))
+            lick = self.read_capacitance()
 
-            # Update data lists
+            # Update data lists, timestamped when the sample was actually taken
             current_time = time.time()
-            self.times.append(current_time - self.start_time)
-            self.licks.append(lick)
-            self.clicks.append(position_change)
+            self.store_sample(current_time - self.start_time, position_change, lick)
 
             # Emit a signal for capacitance update
             self.serialCapacitanceUpdated.emit((current_time - self.start_time), lick)
         except Exception as e:
             print(f"Exception in processData: {e}")
+
+
+    def read_capacitance(self) -> int:
+        """ Read the capacitance line that follows each encoder reading (simulated in development mode).
+        """
+        if self.development_mode:
+            return random.randint(0, 1000)
+        return int(float(self.arduino.readline().decode('utf-8').strip()))
+
+
+    def store_sample(self, elapsed: float, clicks: int, lick: int):
+        """ Keep a sample, either in the in-memory lists or in the attached triggered recorder.
+
+        The session journal receives only what is kept: every sample in continuous mode, the
+        window samples and background trace in triggered mode.
+        """
+        self.stats.add(Clicks=clicks, Lick=lick)
+        if self.recorder is not None:
+            kept, background = self.recorder.append(elapsed, clicks, lick)
+            if self.journal is not None:
+                for kept_clicks, kept_time, kept_lick, window in kept:
+                    self.journal.append_sample(kept_time, kept_clicks, kept_lick, window)
+                if background is not None:
+                    self.journal.append_background(background[1], background[0], background[2])
+            return
+        if self.journal is not None:
+            self.journal.append_sample(elapsed, clicks, lick)
+        self.times.append(elapsed)
+        self.licks.append(lick)
+        self.clicks.append(clicks)
+
+
+    def trigger(self):
+        """ Open (or extend) a recording window around the current sample.
+        """
+        if self.recorder is None:
+            print("No triggered recorder attached; every sample is already recorded.")
+            return
+        self.recorder.trigger()
+
         
+    def detach_data(self) -> dict:
+        """ Take ownership of the data recorded by the last run and reset storage for the next one.
+
+        Returns the sample lists (or the detached triggered recorder) and a snapshot of the
+        statistics. Nothing is copied, so this is cheap enough to call on the GUI thread.
+        """
+        detached = {
+            'data': {'Clicks': self.clicks, 'Time': self.times, 'Lick': self.licks},
+            'recorder': self.recorder.detach() if self.recorder is not None else None,
+            'stats': self.stats.to_dict(),
+        }
+        self.init_data()
+        return detached
+
+
     def get_data(self):
         from pandas import DataFrame
 
+        if self.recorder is not None:
+            return self.recorder.get_data()
+
         clicks = self.clicks
         times = self.times
         licks = self.licks
@@ -186,6 +334,8 @@ class SerialWorker(QThread):
         self.times = []
         self.licks = []
         self.start_time = time.time()
+        if self.recorder is not None:
+            self.recorder.reset()
     
 
     def __repr__(self):
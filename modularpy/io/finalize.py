@@ -0,0 +1,61 @@
+import os
+
+from PyQt6.QtCore import pyqtSignal, QThread
+
+
+class SessionFinalizer(QThread):
+    """
+    SessionFinalizer is a QThread subclass that runs the end-of-session save steps off the GUI thread.
+
+    It is given a list of `(description, step, path)` triples, where each step is a callable working only on
+    data snapshotted when the session ended, so a new session can start while the previous one is
+    still being written. A step fails by raising or by returning False; the failure is reported, recorded
+    in `failures`, the step's claimed output `path` (if any) is removed, and the remaining steps still run.
+
+    Signals:
+
+        1. `finalizeProgress` (pyqtSignal(int, int, str)): Emits the step number, step count and description before each step.
+        2. `finalizeFailed` (pyqtSignal(str)): Emits a message for each step that failed.
+        3. `finalizeCompleted` (pyqtSignal()): Emits once every step has run.
+    """
+
+    # ===================== PyQt Signals ===================== #
+    finalizeProgress = pyqtSignal(int, int, str) # Emits the step number, step count and description
+    finalizeFailed = pyqtSignal(str) # Emits a message when a step fails
+    finalizeCompleted = pyqtSignal() # Emits when all steps have run
+    # ======================================================== #
+
+    def __init__(self, steps: list):
+        super().__init__()
+        self.steps = steps
+        self.failures: list[str] = []
+
+
+    def run(self):
+        total = len(self.steps)
+        for i, (description, step, path) in enumerate(self.steps, start=1):
+            if self.isInterruptionRequested():
+                break
+            self.finalizeProgress.emit(i, total, description)
+            try:
+                # Savers print their own errors and return False
+                message = None if step() is not False else f"Error saving {description}"
+            except Exception as e:
+                message = f"Error saving {description}: {e}"
+                print(message)
+            if message is not None:
+                self.failures.append(message)
+                self.finalizeFailed.emit(message)
+                self._remove(path)
+        self.finalizeCompleted.emit()
+
+
+    @staticmethod
+    def _remove(path: str):
+        """ Remove the (empty or partial) output of a failed step so it is not mistaken for a saved file. """
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,239 @@
+"""
+Crash-safe, append-only session journal.
+
+Every encoder sample, note and parameter change of a session is appended to a journal
+file next to the session data. Records are buffered in memory and written plus fsynced
+in batches every `flush_interval_s`, so a crash loses at most one flush interval.
+
+Record layout (little endian):
+
+    payload length (u32) | CRC32 of type + payload (u32) | type (u8) | payload
+
+Samples are packed into one binary record per flush, which keeps recovery of multi-hour
+sessions to a linear scan with one `np.frombuffer` per flush. A torn or corrupted tail
+(the record being written when the crash happened) fails its checksum and is dropped.
+
+With a `TriggeredRecorder` attached, only what the recorder keeps is journaled: window
+samples (tagged with their window index) and the decimated background trace.
+
+A journal is only a crash log: once the session has been saved it is deleted.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+MAGIC = b'MPYWAL1\x00'
+
+META = 1
+SAMPLES = 2
+NOTE = 3
+PARAMETER = 4
+CLOSE = 5
+BACKGROUND = 6
+
+# Window is -1 for continuously recorded samples
+SAMPLE_DTYPE = np.dtype([('Time', '<f8'), ('Clicks', '<i4'), ('Lick', '<i4'), ('Window', '<i4')])
+
+_RECORD_HEADER = struct.Struct('<IIB')
+
+
+class SessionJournal:
+    """ Append-only journal of samples, notes and parameter changes, fsynced in batches.
+
+    #### Example Usage:
+    ```python
+    journal = SessionJournal('session_journal.wal', flush_interval_s=1.0)
+    journal.write_meta({'configuration': {...}, 'notes': []})
+    journal.append_sample(0.05, 3, 120)
+    journal.add_note('Mouse started licking')
+    journal.close()
+    ```
+    """
+
+    def __init__(self, path: str, flush_interval_s: float = 1.0):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self._samples: list[tuple] = []
+        self._background: list[tuple] = []
+        self._records: list[tuple[int, bytes]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+
+        # Never append to an existing journal: records after a torn tail could not be recovered
+        self._file = open(path, 'xb')
+        self._file.write(MAGIC)
+        self._sync()
+
+        self._flusher = threading.Thread(target=self._run, name='SessionJournalFlusher', daemon=True)
+        self._flusher.start()
+
+    # ============================== Public Methods ============================== #
+
+    def append_sample(self, time: float, clicks: int, lick: int, window: int = -1):
+        with self._lock:
+            self._samples.append((time, clicks, lick, window))
+
+    def append_background(self, time: float, clicks: int, lick: int):
+        with self._lock:
+            self._background.append((time, clicks, lick, -1))
+
+    def add_note(self, note: str):
+        self._append_record(NOTE, note.encode('utf-8'))
+
+    def set_parameter(self, key, value):
+        self._append_record(PARAMETER, json.dumps({'key': key, 'value': value}, default=str).encode('utf-8'))
+
+    def write_meta(self, meta: dict):
+        self._append_record(META, json.dumps(meta, default=str).encode('utf-8'))
+
+    def flush(self):
+        """ Write and fsync everything buffered so far. """
+        with self._write_lock:
+            with self._lock:
+                samples, self._samples = self._samples, []
+                background, self._background = self._background, []
+                records, self._records = self._records, []
+            if self._file.closed:
+                return
+            if samples:
+                self._write_record(SAMPLES, np.array(samples, dtype=SAMPLE_DTYPE).tobytes())
+            if background:
+                self._write_record(BACKGROUND, np.array(background, dtype=SAMPLE_DTYPE).tobytes())
+            for record_type, payload in records:
+                self._write_record(record_type, payload)
+            if samples or background or records:
+                self._sync()
+
+    def close(self):
+        """ Flush, mark the journal as cleanly closed and stop the flusher thread. """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self._append_record(CLOSE, b'')
+        self.flush()
+        self._file.close()
+
+    def delete(self):
+        """ Close the journal and remove its file, once the session it protects has been saved. """
+        self.close()
+        try:
+            os.remove(self.path)
+            print(f"Session journal {self.path} removed.")
+        except OSError as e:
+            print(f"Error removing session journal: {e}")
+
+    # ============================== Private Methods ============================= #
+
+    def _append_record(self, record_type: int, payload: bytes):
+        with self._lock:
+            self._records.append((record_type, payload))
+
+    def _write_record(self, record_type: int, payload: bytes):
+        crc = zlib.crc32(bytes([record_type]) + payload)
+        self._file.write(_RECORD_HEADER.pack(len(payload), crc, record_type))
+        self._file.write(payload)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Exception while flushing session journal: {e}")
+
+
+def read_journal(path: str):
+    """ Yield `(record_type, payload)` for every intact record, stopping at a torn or corrupt tail.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"Not a modularpy session journal: {path}")
+
+    pos = len(MAGIC)
+    while pos + _RECORD_HEADER.size <= len(data):
+        length, crc, record_type = _RECORD_HEADER.unpack_from(data, pos)
+        start = pos + _RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(bytes([record_type]) + payload) != crc:
+            print(f"Journal truncated at byte {pos}; dropping the incomplete tail.")
+            return
+        yield record_type, payload
+        pos = start + length
+
+
+def recover(journal_path: str, output_dir: str = None) -> dict:
+    """ Rebuild a session's encoder data, configuration and notes files from its journal.
+
+    Files are written next to the journal (or in `output_dir`) using the journal's own
+    `<timestamp>_sub-<id>_ses-<id>_task-<task>` prefix. Triggered recordings also get their
+    `Window` column and background trace back. Returns the paths written.
+    """
+    import pandas as pd
+
+    meta = {}
+    notes = []
+    updates = []
+    sample_blocks = []
+    background_blocks = []
+    clean = False
+    for record_type, payload in read_journal(journal_path):
+        if record_type == SAMPLES:
+            sample_blocks.append(np.frombuffer(payload, dtype=SAMPLE_DTYPE))
+        elif record_type == BACKGROUND:
+            background_blocks.append(np.frombuffer(payload, dtype=SAMPLE_DTYPE))
+        elif record_type == NOTE:
+            notes.append(payload.decode('utf-8'))
+        elif record_type == PARAMETER:
+            updates.append(json.loads(payload))
+        elif record_type == META:
+            meta = json.loads(payload)
+            notes = list(meta.get('notes', [])) + notes
+        elif record_type == CLOSE:
+            clean = True
+
+    samples = np.concatenate(sample_blocks) if sample_blocks else np.empty(0, dtype=SAMPLE_DTYPE)
+    background = np.concatenate(background_blocks) if background_blocks else None
+    triggered = background is not None or bool((samples['Window'] >= 0).any())
+    configuration = dict(meta.get('configuration', {}))
+    for update in updates:
+        configuration[update['key']] = update['value']
+
+    directory = output_dir or os.path.dirname(os.path.abspath(journal_path))
+    prefix = os.path.basename(journal_path)
+    prefix = prefix[:-len('_journal.wal')] if prefix.endswith('_journal.wal') else os.path.splitext(prefix)[0]
+    os.makedirs(os.path.join(directory, 'beh'), exist_ok=True)
+    paths = {
+        'encoder': os.path.join(directory, 'beh', f"{prefix}_encoder-data.csv"),
+        'configuration': os.path.join(directory, f"{prefix}_configuration.csv"),
+        'notes': os.path.join(directory, f"{prefix}_notes.txt"),
+    }
+
+    encoder = {'Clicks': samples['Clicks'], 'Time': samples['Time'], 'Lick': samples['Lick']}
+    if triggered:
+        encoder['Window'] = samples['Window']
+    pd.DataFrame(encoder).to_csv(paths['encoder'], index=False)
+    if background is not None:
+        paths['background'] = os.path.join(directory, 'beh', f"{prefix}_encoder-background.csv")
+        pd.DataFrame({
+            'Clicks': background['Clicks'],
+            'Time': background['Time'],
+            'Lick': background['Lick'],
+        }).to_csv(paths['background'], index=False)
+    pd.DataFrame(configuration.items(), columns=['Parameter', 'Value']).to_csv(paths['configuration'], index=False)
+    with open(paths['notes'], 'w') as f:
+        f.write('\n'.join(notes))
+
+    state = 'cleanly closed' if clean else 'interrupted'
+    print(f"Recovered {len(samples)} samples and {len(notes)} notes from {state} journal {journal_path}")
+    return paths
@@ -0,0 +1,166 @@
+import csv
+import time
+
+from modularpy.io.encoder import SerialWorker
+
+
+class ReplayWorker(SerialWorker):
+    """
+    ReplayWorker is a drop-in replacement for SerialWorker that re-drives the encoder signals
+    from a previously recorded session file instead of a live serial port.
+
+    The recording is streamed row by row from disk, so multi-hour sessions are never loaded
+    into memory at once. Two layouts are understood:
+
+        1. Encoder data saved by `ExperimentConfig.save_encoder_data` (`Clicks`, `Time`, `Lick` columns).
+        2. Two column plot exports (`x0000`, `y0000`) holding time and integer capacitance only.
+
+    Capacitance must be integral, as emitted by `serialCapacitanceUpdated`; replay stops with an
+    error at the first non-integer value instead of truncating it.
+
+    Playback speed:
+
+        - `speed=1.0` replays in real time using the recorded timestamps.
+        - `speed=N` replays N times faster than real time.
+        - `speed=0` (or None) emits every sample as fast as possible.
+
+    `pause()` holds playback at the current row and `resume()` continues from it, with the
+    pacing shifted by the time spent paused.
+
+    Signals are inherited from SerialWorker, so widgets connected to `serialDataReceived` and
+    `serialCapacitanceUpdated` behave exactly as they do during a live session.
+    """
+
+    def __init__(self,
+                 replay_file: str,
+                 speed: float = 1.0,
+                 sample_interval: int = 50,
+                 resistor=None):
+
+        super().__init__(
+            serial_port=replay_file,
+            baud_rate=None,
+            sample_interval=sample_interval,
+            resistor=resistor,
+            development_mode=False,
+        )
+        self.replay_file = replay_file
+        self.speed = speed
+
+
+    def run(self):
+        self.init_data()
+        self.start_time = time.time()
+        try:
+            self.run_replay_mode()
+        finally:
+            self.stats.flush()
+            print("Replay Stream stopped.")
+
+
+    def run_replay_mode(self):
+        """
+        Stream samples from the replay file and emit them paced by their recorded timestamps.
+
+        Emits:
+
+        - serialDataReceived (pyqtSignal(int)): Emits the recorded encoder clicks of each sample.
+        - serialCapacitanceUpdated (pyqtSignal(float, int)): Emits the recorded time and capacitance.
+        """
+        try:
+            f = open(self.replay_file, 'r', newline='')
+        except OSError as e:
+            print(f"Replay file error: {e}")
+            return
+
+        with f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                print(f"Replay file is empty: {self.replay_file}")
+                return
+            columns = self._resolve_columns(header)
+            if columns is None:
+                print(f"Unrecognized replay file columns: {header}")
+                return
+
+            first_time = None
+            wall_start = time.perf_counter()
+            for row in reader:
+                if self.isInterruptionRequested():
+                    break
+                try:
+                    clicks, elapsed, lick = self._parse_row(row, columns)
+                except (ValueError, IndexError):
+                    print(f"Malformed row in replay file: {row}")
+                    continue
+                if not lick.is_integer():
+                    print(f"Non-integer capacitance {lick} in replay file {self.replay_file}; "
+                          f"only integer capacitance recordings can be replayed.")
+                    break
+                lick = int(lick)
+
+                if first_time is None:
+                    first_time = elapsed
+                if self.speed:
+                    target = wall_start + (elapsed - first_time) / self.speed
+                    if not self._sleep_until(target):
+                        break
+                if self._paused.is_set():
+                    wall_start += self._wait_while_paused()
+                    if self.isInterruptionRequested():
+                        break
+
+                self.store_sample(elapsed, clicks, lick)
+                self.serialDataReceived.emit(clicks)
+                self.serialCapacitanceUpdated.emit(elapsed, lick)
+
+
+    def _sleep_until(self, target: float) -> bool:
+        """ Sleep until the perf_counter deadline, returning False if interrupted while waiting.
+        """
+        while True:
+            remaining = target - time.perf_counter()
+            if remaining <= 0:
+                return True
+            if self.isInterruptionRequested():
+                return False
+            # Sleep in short slices so a stop request is honoured promptly
+            time.sleep(min(remaining, 0.05))
+
+
+    def _wait_while_paused(self) -> float:
+        """ Block while paused (or until a stop is requested) and return the seconds spent paused.
+        """
+        paused_at = time.perf_counter()
+        while self._paused.is_set() and not self.isInterruptionRequested():
+            time.sleep(0.01)
+        return time.perf_counter() - paused_at
+
+
+    @staticmethod
+    def _resolve_columns(header: list) -> dict | None:
+        """ Map the header of a recording to the column indices of clicks, time and capacitance.
+        """
+        names = [name.strip() for name in header]
+        if {'Clicks', 'Time', 'Lick'}.issubset(names):
+            return {
+                'clicks': names.index('Clicks'),
+                'time': names.index('Time'),
+                'lick': names.index('Lick'),
+            }
+        if {'x0000', 'y0000'}.issubset(names):
+            return {
+                'clicks': None,
+                'time': names.index('x0000'),
+                'lick': names.index('y0000'),
+            }
+        return None
+
+
+    @staticmethod
+    def _parse_row(row: list, columns: dict) -> tuple[int, float, float]:
+        clicks = 0 if columns['clicks'] is None else int(float(row[columns['clicks']]))
+        elapsed = float(row[columns['time']])
+        lick = float(row[columns['lick']])
+        return clicks, elapsed, lick
@@ -0,0 +1,130 @@
+import math
+import time
+from collections import deque
+
+
+class DeadlineScheduler:
+    """ Absolute-deadline scheduler for fixed-rate sampling loops.
+
+    Sleeping a fixed interval after each sample lets the real period drift by however long
+    the work took. DeadlineScheduler instead keeps an absolute grid of deadlines on
+    `time.perf_counter()` and sleeps only for what remains until the next one, so the
+    achieved rate matches the configured rate on average.
+
+    When a tick is late the loop catches up by returning immediately until it is back on the
+    grid. If it falls more than `max_catchup` periods behind (e.g. after a long stall), the
+    missed ticks are skipped and the grid is re-anchored rather than emitting a burst.
+
+    `pause()` and `resume()` suspend the clock: the grid and statistics continue after a
+    pause as if it never happened, so paused periods count neither as ticks nor as lateness.
+
+    #### Example Usage:
+    ```python
+    scheduler = DeadlineScheduler(interval_s=0.05)
+    scheduler.start()
+    while running:
+        sample()
+        scheduler.wait()
+    print(scheduler.summary())
+    ```
+    """
+
+    def __init__(self, interval_s: float, max_catchup: int = 5, history: int = 1000):
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        self.interval_s = interval_s
+        self.max_catchup = max_catchup
+        self.history = history
+        self.start()
+
+    def start(self):
+        """ Anchor the deadline grid at the current time and reset the statistics.
+        """
+        now = time.perf_counter()
+        self._next_deadline = now + self.interval_s
+        self._started = now
+        self._last_tick = now
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_lateness_s = 0.0
+        self._lateness = deque(maxlen=self.history)
+        self._periods = deque(maxlen=self.history)
+        self._paused_at = None
+
+    def pause(self):
+        """ Suspend the clock until `resume()`; repeated calls keep the first pause time.
+        """
+        if self._paused_at is None:
+            self._paused_at = time.perf_counter()
+
+    def resume(self):
+        """ Shift the deadline grid and the rate window past the paused period.
+        """
+        if self._paused_at is None:
+            return
+        paused = time.perf_counter() - self._paused_at
+        self._paused_at = None
+        self._next_deadline += paused
+        self._started += paused
+        self._last_tick += paused
+
+    def wait(self) -> float:
+        """ Block until the next deadline and return how late the tick was, in seconds.
+        """
+        remaining = self._next_deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+        now = time.perf_counter()
+        lateness = max(0.0, now - self._next_deadline)
+        if lateness >= self.interval_s:
+            self.overruns += 1
+
+        if lateness > self.max_catchup * self.interval_s:
+            # Too far behind to catch up: drop the missed ticks and re-anchor on the grid
+            missed = math.floor(lateness / self.interval_s)
+            self.skipped += missed
+            self._next_deadline += missed * self.interval_s
+        self._next_deadline += self.interval_s
+
+        self.ticks += 1
+        self.max_lateness_s = max(self.max_lateness_s, lateness)
+        self._lateness.append(lateness)
+        self._periods.append(now - self._last_tick)
+        self._last_tick = now
+        return lateness
+
+    @property
+    def achieved_rate_hz(self) -> float:
+        elapsed = self._last_tick - self._started
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        """ Return timing statistics over the run (rates) and the recent history (jitter, lateness).
+        """
+        periods = list(self._periods)
+        mean_period = sum(periods) / len(periods) if periods else 0.0
+        jitter = (
+            math.sqrt(sum((p - mean_period) ** 2 for p in periods) / len(periods))
+            if periods else 0.0
+        )
+        lateness = list(self._lateness)
+        return {
+            'configured_rate_hz': 1.0 / self.interval_s,
+            'achieved_rate_hz': self.achieved_rate_hz,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'jitter_ms': 1000 * jitter,
+            'mean_lateness_ms': 1000 * sum(lateness) / len(lateness) if lateness else 0.0,
+            'max_lateness_ms': 1000 * self.max_lateness_s,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['achieved_rate_hz']:.2f}/{s['configured_rate_hz']:.2f} Hz over {s['ticks']} ticks | "
+            f"jitter {s['jitter_ms']:.2f} ms | lateness mean {s['mean_lateness_ms']:.2f} ms, "
+            f"max {s['max_lateness_ms']:.2f} ms | overruns {s['overruns']} | skipped {s['skipped']}"
+        )
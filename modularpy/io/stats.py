@@ -0,0 +1,178 @@
+import json
+import threading
+
+import numpy as np
+
+
+class ChannelStatistics:
+    """ Running statistics of a single channel, updated one chunk of samples at a time.
+
+    Keeps the count, mean and variance (Welford, merged per chunk with Chan's parallel
+    update), min/max, a fixed-bin histogram over `[low, high)` with under/overflow counts,
+    and a ring buffer of the most recent `window` values for percentiles. Everything except
+    the percentiles is O(1) to query; percentiles cost O(window).
+    """
+
+    def __init__(self, low: float, high: float, bins: int = 64, window: int = 1000):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float('nan')
+        self.max = float('nan')
+        self.histogram = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self._recent = np.zeros(self.window, dtype=np.float64)
+        self._recent_pos = 0
+        self._recent_full = False
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        n = values.size
+        if n == 0:
+            return
+
+        # Chan et al. pairwise merge of the chunk's moments into the running moments
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if np.isnan(self.min) else min(self.min, chunk_min)
+        self.max = chunk_max if np.isnan(self.max) else max(self.max, chunk_max)
+
+        low, high = self.edges[0], self.edges[-1]
+        self.underflow += int((values < low).sum())
+        self.overflow += int((values >= high).sum())
+        inside = values[(values >= low) & (values < high)]
+        bins = len(self.histogram)
+        index = ((inside - low) * (bins / (high - low))).astype(np.int64)
+        self.histogram += np.bincount(np.minimum(index, bins - 1), minlength=bins)
+
+        self._append_recent(values)
+
+    def _append_recent(self, values: np.ndarray):
+        if values.size >= self.window:
+            self._recent[:] = values[-self.window:]
+            self._recent_pos = 0
+            self._recent_full = True
+            return
+        end = self._recent_pos + values.size
+        if end <= self.window:
+            self._recent[self._recent_pos:end] = values
+        else:
+            split = self.window - self._recent_pos
+            self._recent[self._recent_pos:] = values[:split]
+            self._recent[:end - self.window] = values[split:]
+        self._recent_full = self._recent_full or end >= self.window
+        self._recent_pos = end % self.window
+
+    def percentiles(self, q=(5, 50, 95)) -> dict:
+        """ Percentiles of the most recent `window` values (None before the first sample). """
+        recent = self._recent if self._recent_full else self._recent[:self._recent_pos]
+        if recent.size == 0:
+            return {f"p{p:g}": None for p in q}
+        return {f"p{p:g}": float(v) for p, v in zip(q, np.percentile(recent, q))}
+
+    def summary(self) -> dict:
+        """ JSON-safe summary; undefined values (min/max of an empty channel) are None. """
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            **self.percentiles(),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            **self.summary(),
+            'histogram_edges': self.edges.tolist(),
+            'histogram': self.histogram.tolist(),
+            'underflow': self.underflow,
+            'overflow': self.overflow,
+        }
+
+
+class StreamStatistics:
+    """ Per-channel streaming statistics of the encoder stream.
+
+    Samples are buffered and folded into the channel statistics every `chunk_size` samples,
+    so the acquisition thread pays a list append per sample and a vectorized update per chunk.
+    Queries through `summary()` and `to_dict()` are safe from any thread and never copy the
+    recorded dataset; the channels themselves are only consistent under the lock.
+
+    #### Example Usage:
+    ```python
+    stats = config.encoder.stats
+    stats.summary()            # {'Clicks': {'mean': ..., 'std': ..., 'p50': ...}, 'Lick': {...}}
+    stats.summary()['Lick']['mean']
+    stats.save('encoder-stats.json')
+    ```
+    """
+
+    DEFAULT_RANGES = {'Clicks': (-64, 64), 'Lick': (0, 1024)}
+
+    def __init__(self, ranges: dict = None, bins: int = 64, window: int = 1000, chunk_size: int = 32):
+        ranges = ranges or self.DEFAULT_RANGES
+        self.channels = {name: ChannelStatistics(low, high, bins, window) for name, (low, high) in ranges.items()}
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._pending = {name: [] for name in self.channels}
+        self._pending_count = 0
+
+    def __getitem__(self, name: str) -> ChannelStatistics:
+        return self.channels[name]
+
+    def reset(self):
+        with self._lock:
+            self._pending = {name: [] for name in self.channels}
+            self._pending_count = 0
+            for channel in self.channels.values():
+                channel.reset()
+
+    def add(self, **values):
+        """ Add one sample, e.g. `add(Clicks=3, Lick=120)`. """
+        pending = self._pending
+        for name, value in values.items():
+            pending[name].append(value)
+        self._pending_count += 1
+        if self._pending_count >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {name: [] for name in self.channels}
+            self._pending_count = 0
+            for name, values in pending.items():
+                self.channels[name].update(np.asarray(values, dtype=np.float64))
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: channel.summary() for name, channel in self.channels.items()}
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {name: channel.to_dict() for name, channel in self.channels.items()}
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1, allow_nan=False)
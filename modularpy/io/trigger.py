@@ -0,0 +1,154 @@
+import threading
+from collections import deque
+
+
+class TriggeredRecorder:
+    """ Keep only the encoder data surrounding detected events, plus a decimated background trace.
+
+    Every sample passes through a pre-trigger ring buffer holding the last `pre_window_s`
+    seconds. When a trigger fires, the ring buffer contents open a new window that keeps
+    recording until `post_window_s` seconds after the last trigger; triggers arriving while a
+    window is open extend it instead of starting a new one.
+
+    Triggers come from two sources:
+
+        1. A rising edge of the capacitance (`Lick`) stream across `threshold`.
+        2. An external call to `trigger()`, e.g. from a task controller or the console.
+
+    Independently of windows, one background sample is kept every `background_decimation`
+    samples. Background clicks are summed over the decimation period so the running
+    distance is preserved.
+
+    #### Example Usage:
+    ```python
+    recorder = TriggeredRecorder(pre_window_s=1.0, post_window_s=2.0, threshold=500)
+    encoder.recorder = recorder
+    encoder.trigger()           # mark a task event
+    windows = encoder.get_data()
+    background = recorder.get_background()
+    ```
+    """
+
+    def __init__(self,
+                 pre_window_s: float = 1.0,
+                 post_window_s: float = 2.0,
+                 threshold: int = None,
+                 background_decimation: int = 20):
+
+        self.pre_window_s = pre_window_s
+        self.post_window_s = post_window_s
+        self.threshold = threshold
+        self.background_decimation = max(1, int(background_decimation))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._ring = deque()
+            self._pending_trigger = False
+            self._previous_lick = None
+            self._window_end = None
+
+            self.windows: list[list[tuple]] = []
+            self.trigger_times: list[float] = []
+
+            self.background: list[tuple] = []
+            self._background_count = 0
+            self._background_clicks = 0
+
+    def detach(self) -> 'TriggeredRecorder':
+        """ Move the recorded windows and background into a new recorder and reset this one.
+        """
+        detached = TriggeredRecorder(self.pre_window_s, self.post_window_s, self.threshold, self.background_decimation)
+        with self._lock:
+            detached.windows = self.windows
+            detached.trigger_times = self.trigger_times
+            detached.background = self.background
+        self.reset()
+        return detached
+
+    @property
+    def recording(self) -> bool:
+        """ True while a window is open. """
+        return self._window_end is not None
+
+    def trigger(self):
+        """ Request a window around the next sample. Safe to call from any thread.
+        """
+        with self._lock:
+            self._pending_trigger = True
+
+    def append(self, time: float, clicks: int, lick: int) -> tuple[list, tuple | None]:
+        """ Add one sample and return what was kept because of it.
+
+        Returns `(kept, background)`: the `(clicks, time, lick, window)` samples added to a
+        window by this call (the pre-trigger history included when a window opens), and the
+        background sample completed by this call, or None.
+        """
+        with self._lock:
+            sample = (clicks, time, lick)
+            background = self._append_background(sample)
+            kept = []
+
+            crossed = (
+                self.threshold is not None
+                and lick >= self.threshold
+                and (self._previous_lick is None or self._previous_lick < self.threshold)
+            )
+            self._previous_lick = lick
+
+            if crossed or self._pending_trigger:
+                self._pending_trigger = False
+                self.trigger_times.append(time)
+                if self._window_end is None:
+                    # Open a new window seeded with the pre-trigger history
+                    self.windows.append(list(self._ring))
+                    kept.extend(self._ring)
+                    self._ring.clear()
+                self._window_end = time + self.post_window_s
+
+            if self._window_end is not None:
+                self.windows[-1].append(sample)
+                kept.append(sample)
+                if time >= self._window_end:
+                    self._window_end = None
+                window = len(self.windows) - 1
+                return [(*kept_sample, window) for kept_sample in kept], background
+
+            self._ring.append(sample)
+            while self._ring and time - self._ring[0][1] > self.pre_window_s:
+                self._ring.popleft()
+            return kept, background
+
+    def _append_background(self, sample: tuple) -> tuple | None:
+        self._background_clicks += sample[0]
+        self._background_count += 1
+        if self._background_count >= self.background_decimation:
+            background = (self._background_clicks, sample[1], sample[2])
+            self.background.append(background)
+            self._background_count = 0
+            self._background_clicks = 0
+            return background
+        return None
+
+    def get_data(self):
+        """ Return the recorded windows as a DataFrame with a `Window` index column.
+        """
+        from pandas import DataFrame
+
+        with self._lock:
+            rows = [
+                (clicks, time, lick, window)
+                for window, samples in enumerate(self.windows)
+                for clicks, time, lick in samples
+            ]
+        return DataFrame(rows, columns=['Clicks', 'Time', 'Lick', 'Window'])
+
+    def get_background(self):
+        """ Return the decimated background trace as a DataFrame.
+        """
+        from pandas import DataFrame
+
+        with self._lock:
+            rows = list(self.background)
+        return DataFrame(rows, columns=['Clicks', 'Time', 'Lick'])
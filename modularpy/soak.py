@@ -0,0 +1,272 @@
+"""
+Long-duration soak test harness for the acquisition stack.
+
+Drives HardwareManager -> SerialWorker -> EncoderWidget under an offscreen Qt platform,
+fed by a simulated encoder on a local pseudo-terminal, and samples memory, garbage
+collector activity, event-queue latency and throughput over time. The final report
+fits a trend to each metric and flags growth or drift.
+
+Example:
+```
+python -m modularpy soak --duration 3600 --rate 20 --output soak.csv
+```
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import random
+
+import numpy as np
+import yaml
+
+from modularpy.io.scheduler import DeadlineScheduler
+
+
+def current_rss_mb() -> float:
+    """ Return the resident set size of this process in MB (NaN if it cannot be determined).
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return float('nan')
+
+
+class PtyEncoderDevice:
+    """ Simulated lick-detector board writing encoder clicks and capacitance to a pseudo-terminal.
+
+    Each sample is written as two lines, clicks then capacitance, matching what
+    `SerialWorker.run_serial_mode` and `SerialWorker.process_data` read.
+    """
+
+    def __init__(self, rate_hz: float):
+        import pty
+        import tty
+
+        self.rate_hz = rate_hz
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.samples_written = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self):
+        scheduler = DeadlineScheduler(1.0 / self.rate_hz)
+        while not self._stop.is_set():
+            clicks = random.randint(1, 10)
+            lick = random.randint(0, 1000)
+            try:
+                os.write(self.master, f"{clicks}\n{lick}\n".encode('utf-8'))
+            except OSError:
+                return
+            self.samples_written += 1
+            scheduler.wait()
+
+
+class SoakMonitor:
+    """ Periodically sample process and pipeline health while the GUI stack runs.
+
+    Event-queue latency is measured two ways: how late a precise QTimer fires on the GUI
+    thread, and how long `serialCapacitanceUpdated` takes to cross from the worker thread.
+    """
+
+    def __init__(self, encoder, probe_ms: int = 50, sample_every_s: float = 10.0):
+        from PyQt6.QtCore import QTimer, Qt
+
+        self.encoder = encoder
+        self.probe_ms = probe_ms
+        self.sample_every_s = sample_every_s
+        self.rows: list[dict] = []
+
+        self._t0 = time.perf_counter()
+        self._last_sample = self._t0
+        self._reset_window()
+
+        self._probe = QTimer()
+        self._probe.setTimerType(Qt.TimerType.PreciseTimer)
+        self._probe.setInterval(probe_ms)
+        self._probe.timeout.connect(self._on_probe)
+        self.encoder.serialCapacitanceUpdated.connect(self._on_sample)
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        self._last_sample = self._t0
+        self._expected = self._t0 + self.probe_ms / 1000.0
+        self._probe.start()
+
+    def stop(self):
+        self._probe.stop()
+        self._record()
+
+    def _reset_window(self):
+        self._timer_lateness = []
+        self._signal_latency = []
+        self._received = 0
+
+    def _on_probe(self):
+        now = time.perf_counter()
+        self._timer_lateness.append(max(0.0, now - self._expected))
+        self._expected = now + self.probe_ms / 1000.0
+        if now - self._last_sample >= self.sample_every_s:
+            self._record()
+
+    def _on_sample(self, elapsed, lick):
+        self._received += 1
+        if self.encoder.start_time is not None:
+            self._signal_latency.append(time.time() - (self.encoder.start_time + elapsed))
+
+    def _record(self):
+        now = time.perf_counter()
+        window = max(now - self._last_sample, 1e-9)
+        collections = [stats['collections'] for stats in gc.get_stats()]
+        self.rows.append({
+            'elapsed_s': now - self._t0,
+            'rss_mb': current_rss_mb(),
+            'gc_gen0': collections[0],
+            'gc_gen1': collections[1],
+            'gc_gen2': collections[2],
+            'timer_latency_ms': 1000 * float(np.mean(self._timer_lateness)) if self._timer_lateness else float('nan'),
+            'timer_latency_max_ms': 1000 * float(np.max(self._timer_lateness)) if self._timer_lateness else float('nan'),
+            'signal_latency_ms': 1000 * float(np.mean(self._signal_latency)) if self._signal_latency else float('nan'),
+            'throughput_hz': self._received / window,
+            'stored_samples': len(self.encoder.times),
+        })
+        self._last_sample = now
+        self._reset_window()
+
+
+def analyze(rows: list[dict], rate_hz: float, rss_limit_mb_per_h: float = 10.0,
+            latency_drift: float = 2.0, throughput_drop: float = 0.1) -> list[str]:
+    """ Fit trends to the soak samples and return a list of human-readable warnings.
+    """
+    warnings = []
+    if len(rows) < 4:
+        return ["Too few samples to analyze trends; run the soak test longer."]
+
+    elapsed_h = np.array([r['elapsed_s'] for r in rows]) / 3600.0
+    quarter = max(1, len(rows) // 4)
+
+    rss = np.array([r['rss_mb'] for r in rows])
+    if np.isfinite(rss).all():
+        slope = np.polyfit(elapsed_h, rss, 1)[0]
+        # Ignore sub-MB wobble that extrapolates to large hourly rates on short runs
+        if slope > rss_limit_mb_per_h and rss[-1] - rss[0] > 1.0:
+            warnings.append(f"RSS grows by {slope:.1f} MB/h (limit {rss_limit_mb_per_h:.1f} MB/h)")
+
+    for key in ('timer_latency_ms', 'signal_latency_ms'):
+        values = np.array([r[key] for r in rows])
+        head, tail = values[:quarter], values[-quarter:]
+        if np.isnan(head).all() or np.isnan(tail).all():
+            continue
+        first, last = np.nanmean(head), np.nanmean(tail)
+        if last > latency_drift * max(first, 1.0):
+            warnings.append(f"{key} drifted from {first:.2f} ms to {last:.2f} ms")
+
+    throughput = np.array([r['throughput_hz'] for r in rows])
+    last = float(np.mean(throughput[-quarter:]))
+    if last < (1 - throughput_drop) * rate_hz:
+        warnings.append(f"Throughput fell to {last:.1f} Hz (configured {rate_hz:.1f} Hz)")
+
+    gen2 = np.array([r['gc_gen2'] for r in rows])
+    gen2_rate = np.diff(gen2[-quarter - 1:]).mean() if len(gen2) > quarter else 0
+    if gen2_rate > np.diff(gen2[:quarter + 1]).mean() * latency_drift and gen2_rate > 1:
+        warnings.append("Full (gen 2) garbage collections are becoming more frequent")
+
+    return warnings
+
+
+def run_soak(duration_s: float, rate_hz: float = 20.0, sample_every_s: float = 10.0,
+             output: str = None) -> list[dict]:
+    """ Run the full acquisition stack for `duration_s` seconds and print a drift report.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from modularpy.config import ExperimentConfig
+    from modularpy.gui.speedplotter import EncoderWidget
+
+    device = None
+    encoder_params = {
+        'type': 'lick detector',
+        'baudrate': 9600,
+        'sample_interval_ms': int(1000 / rate_hz),
+        'resistor': 'soak',
+    }
+    if sys.platform.startswith('win'):
+        print("No pseudo-terminal available; soaking the simulated development mode instead.")
+        encoder_params.update(port='sim', development_mode=True)
+    else:
+        device = PtyEncoderDevice(rate_hz)
+        encoder_params.update(port=device.port, development_mode=False)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump({'encoder': encoder_params}, f)
+        yaml_path = f.name
+
+    save_dir = tempfile.TemporaryDirectory()
+    app = QApplication.instance() or QApplication([])
+    try:
+        config = ExperimentConfig(yaml_path)
+        config.save_dir = save_dir.name  # keep the session journal out of the working directory
+        widget = EncoderWidget(config)
+        monitor = SoakMonitor(config.encoder, sample_every_s=sample_every_s)
+
+        def finish():
+            monitor.stop()
+            widget.start_button.click()  # toggles the live view off
+            app.quit()
+
+        if device is not None:
+            device.start()
+        widget.start_button.click()  # toggles the live view on
+        monitor.start()
+        QTimer.singleShot(int(duration_s * 1000), finish)
+        app.exec()
+        config.hardware.shutdown()
+        config.wait_for_finalization()
+    finally:
+        if device is not None:
+            device.stop()
+        os.remove(yaml_path)
+        save_dir.cleanup()
+
+    rows = monitor.rows
+    if output:
+        from pandas import DataFrame
+        DataFrame(rows).to_csv(output, index=False)
+        print(f"Soak samples saved to {output}")
+
+    print(f"Soak test ran for {duration_s:.0f} s at {rate_hz:.1f} Hz ({len(rows)} samples)")
+    if rows:
+        print(f"RSS {rows[0]['rss_mb']:.1f} -> {rows[-1]['rss_mb']:.1f} MB | "
+              f"stored samples {rows[-1]['stored_samples']}")
+    warnings = analyze(rows, rate_hz)
+    if warnings:
+        for warning in warnings:
+            print(f"WARNING: {warning}")
+    else:
+        print("No memory growth or latency drift detected.")
+    return rows
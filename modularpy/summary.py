@@ -0,0 +1,247 @@
+"""
+Per-session summary pipeline with an incremental result cache.
+
+Finds every encoder recording under a data root laid out the way `ExperimentConfig`
+writes it (`sub-<id>/ses-<id>/beh/<timestamp>_sub-<id>_ses-<id>_task-<task>_encoder-data.csv`,
+or the `.mpz` archive of it), computes a standard set of metrics per session in a process
+pool and combines them into a cohort table.
+
+Triggered recordings (a `Window` column, or a sibling `_encoder-background` trace) only hold
+the samples around events, so their distance and duration come from the background trace and
+they have no meaningful sample rate.
+
+Results are cached in `.summary_cache.json` at the data root. A file is only recomputed when
+its size/mtime changed *and* its content hash differs, or when the metric parameters change.
+
+Example:
+```
+python -m modularpy summarize ./Experiment --lick-threshold 500 --cm-per-click 0.2
+```
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CACHE_FILE = '.summary_cache.json'
+DEFAULT_LICK_THRESHOLD = 500
+# Bump when the metrics change so cached results are recomputed
+METRICS_VERSION = 2
+
+_SESSION_PATTERN = re.compile(r'sub-(?P<subject>[^_]+)_ses-(?P<session>[^_]+)_task-(?P<task>[^_]+)_encoder-data')
+
+
+def find_sessions(data_root: str) -> list[str]:
+    """ Return the encoder recordings under `data_root` (the save directory or its `data` folder).
+    """
+    if os.path.isdir(os.path.join(data_root, 'data')):
+        data_root = os.path.join(data_root, 'data')
+    recordings = {}
+    # An archived CSV is listed once, through its (faster to read) archive
+    for extension in ('csv', 'mpz'):
+        pattern = os.path.join(data_root, 'sub-*', 'ses-*', 'beh', f'*_encoder-data*.{extension}')
+        for path in glob.glob(pattern):
+            recordings[os.path.splitext(os.path.abspath(path))[0]] = os.path.abspath(path)
+    return sorted(recordings.values())
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def background_path(path: str) -> str | None:
+    """ Return the background trace saved next to a triggered recording, or None.
+    """
+    stem = os.path.splitext(path)[0].replace('_encoder-data', '_encoder-background')
+    for extension in ('.mpz', '.csv'):
+        if os.path.exists(stem + extension):
+            return stem + extension
+    return None
+
+
+def load_session(path: str) -> dict:
+    """ Load the Clicks, Time and Lick columns (and `Window`, if present) of a recording as NumPy arrays.
+    """
+    if path.endswith('.mpz'):
+        from modularpy.io.archive import SessionArchiveReader
+        frame = SessionArchiveReader(path).read()
+    else:
+        import pandas as pd
+        frame = pd.read_csv(path, usecols=lambda name: name in ('Clicks', 'Time', 'Lick', 'Window'))
+    return {name: frame[name].to_numpy() for name in ('Clicks', 'Time', 'Lick', 'Window') if name in frame}
+
+
+def compute_metrics(clicks: np.ndarray, times: np.ndarray, licks: np.ndarray,
+                    lick_threshold: float, cm_per_click: float,
+                    windows: np.ndarray = None) -> dict:
+    """ Compute the standard session metrics with vectorized NumPy.
+
+    With `windows` (the window index of each sample) a lick is only counted as an onset
+    within its own window, never across the gap between two windows.
+    """
+    n = len(times)
+    duration = float(times[-1] - times[0]) if n > 1 else 0.0
+
+    above = licks >= lick_threshold
+    rising = above[1:] & ~above[:-1]
+    if windows is not None:
+        # A window opening above threshold starts a new onset
+        rising = (above[1:] & (windows[1:] != windows[:-1])) | (rising & (windows[1:] == windows[:-1]))
+    lick_onsets = np.flatnonzero(rising) + 1
+    lick_count = int(lick_onsets.size + (1 if n and above[0] else 0))
+
+    distance = float(np.sum(clicks, dtype=np.float64) * cm_per_click)
+    return {
+        'mode': 'continuous',
+        'samples': n,
+        'duration_s': duration,
+        'lick_count': lick_count,
+        'lick_rate_per_min': 60.0 * lick_count / duration if duration > 0 else 0.0,
+        'distance': distance,
+        'mean_speed_per_s': distance / duration if duration > 0 else 0.0,
+        'sample_rate_hz': (n - 1) / duration if duration > 0 else 0.0,
+    }
+
+
+def compute_triggered_metrics(data: dict, background: dict | None,
+                              lick_threshold: float, cm_per_click: float) -> dict:
+    """ Metrics of a triggered recording: licks from the windows, distance and duration from the background.
+
+    The background sums the clicks of every sample, so it covers the running outside the
+    windows too. Without a background trace those metrics are left empty rather than guessed.
+    """
+    metrics = compute_metrics(data['Clicks'], data['Time'], data['Lick'],
+                              lick_threshold, cm_per_click, data.get('Window'))
+    metrics.update(mode='triggered', sample_rate_hz=None)
+    if background is None or len(background['Time']) == 0:
+        metrics.update(duration_s=None, lick_rate_per_min=None, distance=None, mean_speed_per_s=None)
+        return metrics
+
+    times = np.concatenate([data['Time'], background['Time']])
+    duration = float(times.max() - times.min())
+    distance = float(np.sum(background['Clicks'], dtype=np.float64) * cm_per_click)
+    metrics.update(
+        duration_s=duration,
+        lick_rate_per_min=60.0 * metrics['lick_count'] / duration if duration > 0 else 0.0,
+        distance=distance,
+        mean_speed_per_s=distance / duration if duration > 0 else 0.0,
+    )
+    return metrics
+
+
+def summarize_session(path: str, lick_threshold: float, cm_per_click: float) -> dict:
+    """ Worker entry point: load one recording, compute its metrics and content hash.
+
+    Unreadable recordings (e.g. torn CSVs from crashed sessions) return an `error` message
+    instead of raising, so one bad file does not abort the cohort.
+    """
+    try:
+        data = load_session(path)
+        background = background_path(path)
+        if 'Window' in data or background is not None:
+            metrics = compute_triggered_metrics(
+                data, load_session(background) if background is not None else None, lick_threshold, cm_per_click
+            )
+        else:
+            metrics = compute_metrics(data['Clicks'], data['Time'], data['Lick'], lick_threshold, cm_per_click)
+        return {'digest': file_digest(path), 'metrics': metrics}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def _session_labels(path: str) -> dict:
+    match = _SESSION_PATTERN.search(os.path.basename(path))
+    labels = match.groupdict() if match else {'subject': '', 'session': '', 'task': ''}
+    labels['file'] = path
+    return labels
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def summarize_cohort(data_root: str,
+                     lick_threshold: float = DEFAULT_LICK_THRESHOLD,
+                     cm_per_click: float = 1.0,
+                     workers: int = None,
+                     output: str = None):
+    """ Summarize every session under `data_root`, recomputing only new or changed recordings.
+
+    Returns the cohort table as a DataFrame, also written to `output`
+    (defaults to `cohort_summary.csv` in the data root).
+    """
+    import pandas as pd
+
+    cache_path = os.path.join(data_root, CACHE_FILE)
+    cache = _load_cache(cache_path)
+    params = {'lick_threshold': lick_threshold, 'cm_per_click': cm_per_click, 'version': METRICS_VERSION}
+
+    sessions = find_sessions(data_root)
+    stale = []
+    for path in sessions:
+        stat = os.stat(path)
+        entry = cache.get(path)
+        if entry is None or entry.get('params') != params:
+            stale.append(path)
+        elif (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            # Touched but possibly unchanged (e.g. copied); fall back to the content hash
+            if file_digest(path) == entry['digest']:
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            else:
+                stale.append(path)
+
+    errors = {}
+    if stale:
+        print(f"Summarizing {len(stale)} of {len(sessions)} sessions...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(summarize_session, stale,
+                               [lick_threshold] * len(stale), [cm_per_click] * len(stale))
+            for path, result in zip(stale, results):
+                if 'error' in result:
+                    # Not cached, so the session is retried on the next run
+                    print(f"Error summarizing {path}: {result['error']}")
+                    cache.pop(path, None)
+                    errors[path] = result['error']
+                    continue
+                stat = os.stat(path)
+                cache[path] = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'digest': result['digest'],
+                    'params': params,
+                    'metrics': result['metrics'],
+                }
+    else:
+        print(f"All {len(sessions)} sessions are up to date.")
+
+    # Drop recordings that no longer exist so the cache does not grow without bound
+    cache = {path: cache[path] for path in sessions if path in cache}
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=1)
+
+    rows = [
+        {**_session_labels(path), 'error': errors[path]} if path in errors
+        else {**_session_labels(path), **cache[path]['metrics'], 'error': ''}
+        for path in sessions
+    ]
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = table.sort_values(['subject', 'session', 'file']).reset_index(drop=True)
+
+    output = output or os.path.join(data_root, 'cohort_summary.csv')
+    table.to_csv(output, index=False)
+    print(f"Cohort summary saved to {output}")
+    return table